@@ -1,70 +1,224 @@
 import os
 import io
+import queue
+import platform
 import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
 from PIL import Image
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
-import tensorflow as tf
+
+# oneDNN (kernel Conv+BN+ReLU yang di-fuse) harus diatur sebelum TensorFlow di-import;
+# TensorFlow sendiri baru di-import lewat load_tf() saat halaman Classification dibuka
+os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "1")
+os.environ.setdefault("TF_ONEDNN_USE_SYSTEM_ALLOCATOR", "1")
 
 # ─── Configuration ─────────────────────────────────────────────────────────────
 MODEL_OPTIONS = {
-    "MobileNetV1": "MobileNetV1_no_dropout.h5",
-    "MobileNetV2": "MobileNetV2_no_dropout.h5",
+    "MobileNetV1": "MobileNetV1_no_dropout",
+    "MobileNetV2": "MobileNetV2_no_dropout",
 }
 CLASS_MAPPING = {0: 'Jahe', 1: 'Kencur', 2: 'Kunyit', 3: 'Lengkuas'}
 TARGET_SIZE   = (224, 224)
+# Model int8 baru dikalibrasi dengan 4 gambar datatest/ dan belum dievaluasi pada
+# data terpisah; aktifkan hanya secara eksplisit dengan SPICELINK_INT8=1
+USE_INT8      = os.environ.get("SPICELINK_INT8") == "1"
+POOL_SIZE     = 2   # interpreter per model; tf.lite.Interpreter tidak thread-safe
+RESULT_COLS   = 3   # kolom hasil saat beberapa gambar diunggah
+MAX_BATCH     = 8   # batas ukuran batch; arena interpreter tumbuh sesuai batch terbesar
 
 # ─── Helper Functions ──────────────────────────────────────────────────────────
 @st.cache_resource(show_spinner=False)
 def load_spice_images():
-    """Cache paths to sample spice images."""
-    spice_dir = "datatest"
-    return {
-        name: os.path.join(spice_dir, f"{name.lower()}.jpeg")
-        for name in CLASS_MAPPING.values()
-    }
+    """Cache byte gambar contoh rempah; dibaca dari disk sekali per worker."""
+    spice_dir = "assets"
+    images = {}
+    for name in CLASS_MAPPING.values():
+        with open(os.path.join(spice_dir, f"{name.lower()}.jpeg"), "rb") as f:
+            images[name] = f.read()
+    return images
 
-@st.cache_resource(show_spinner=False, max_entries=4)
-def load_model(path):
-    """Load a .h5 model given its path (cached per path)."""
+@st.cache_resource(show_spinner=False)
+def has_fast_int8():
+    """
+    True bila CPU punya kernel int8 yang cepat (ARM NEON, atau x86 dengan VNNI).
+    Di x86 tanpa VNNI model int8 justru lebih lambat dari fp16.
+    """
+    if platform.machine().lower() in ("aarch64", "arm64"):
+        return True
     try:
-        return tf.keras.models.load_model(path)
-    except Exception as e:
-        st.error(f"Error loading model:\n{e}")
-        return None
+        with open("/proc/cpuinfo") as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {"avx512_vnni", "avx_vnni"})
+
+def model_variants(model_name):
+    """
+    Pasangan (kuantisasi, path .tflite) untuk model_name, urut sesuai prioritas:
+    fp16 (atau int8 bila USE_INT8 dan CPU mendukung), lalu varian dynamic-range
+    sebagai fallback.
+    """
+    preferred = "int8" if USE_INT8 and has_fast_int8() else "fp16"
+    return [
+        (quantization, f"{MODEL_OPTIONS[model_name]}_{quantization}.tflite")
+        for quantization in (preferred, "dynamic")
+    ]
 
-def compress_image(file, max_size_kb=200):
+def to_model_input(pixels, details):
     """
-    Kompres file upload (BytesIO) ke JPEG dengan kualitas menurun
-    hingga ukuran di bawah max_size_kb KB.
-    Kembalikan BytesIO baru.
+    Ubah piksel uint8 (N, 224, 224, 3) ke dtype input interpreter. Model int8
+    dikalibrasi dengan skala 1/255, jadi pikselnya bisa dipakai langsung.
     """
-    img = Image.open(file)
-    buf = io.BytesIO()
-    quality = 85
+    if details["dtype"] == np.float32:
+        return np.multiply(pixels, np.float32(1.0 / 255.0), dtype=np.float32)
+    scale, zero_point = details["quantization"]
+    if details["dtype"] == np.uint8 and zero_point == 0 and np.isclose(scale * 255.0, 1.0):
+        return pixels
+    info = np.iinfo(details["dtype"])
+    return np.clip(np.round(pixels / (255.0 * scale) + zero_point), info.min, info.max).astype(details["dtype"])
+
+def dequantize(output, details):
+    """Ubah output interpreter kembali ke probabilitas float32."""
+    if details["dtype"] == np.float32:
+        return output
+    scale, zero_point = details["quantization"]
+    return (output.astype(np.float32) - zero_point) * scale
+
+def usable_cpus():
+    """Jumlah CPU yang boleh dipakai proses ini (menghormati batas CPU container)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+def interpreter_threads():
+    """Jumlah thread per interpreter: CPU yang tersedia dibagi rata ke pool."""
+    return max(1, usable_cpus() // POOL_SIZE)
+
+@st.cache_resource(show_spinner=False)
+def load_tf():
+    """
+    Import TensorFlow sekali per proses dan tetapkan ukuran thread pool-nya
+    sebelum op TF pertama dijalankan (setelah itu tidak bisa diubah lagi).
+    Halaman Home/About tidak pernah memanggil ini.
+    """
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(usable_cpus())
+        tf.config.threading.set_inter_op_parallelism_threads(2)
+    except RuntimeError:
+        pass  # runtime TF sudah terinisialisasi
+    return tf
+
+def create_interpreter(path, quantization):
+    """
+    Buat dan panaskan satu tf.lite.Interpreter untuk file .tflite.
+    Kembalikan (interpreter, input_details, output_details).
+    """
+    tf = load_tf()
+    from convert_models import op_resolver_type  # XNNPACK hanya untuk varian yang aman
+    interpreter = tf.lite.Interpreter(
+        model_path=path,
+        num_threads=interpreter_threads(),
+        experimental_op_resolver_type=op_resolver_type(quantization),
+    )
+    interpreter.allocate_tensors()
+    input_details  = interpreter.get_input_details()[0]
+    output_details = interpreter.get_output_details()[0]
 
-    # Turunkan kualitas secara bertahap hingga target tercapai
-    while True:
-        buf.seek(0)
-        img.save(buf, format="JPEG", quality=quality, optimize=True)
-        size_kb = buf.tell() / 1024
-        if size_kb <= max_size_kb or quality < 30:
+    # Warm-up: invoke pertama menyiapkan kernel/delegate, jangan biarkan user menunggu
+    interpreter.set_tensor(input_details["index"], np.zeros(input_details["shape"], dtype=input_details["dtype"]))
+    interpreter.invoke()
+    return interpreter, input_details, output_details
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_predictor(model_name):
+    """
+    Muat model .tflite untuk model_name (di-cache per nama), dengan fallback
+    ke varian berikutnya dari model_variants() bila varian utama gagal dimuat.
+    Kembalikan fungsi predict(pixels) di atas pool interpreter yang dipakai
+    bersama oleh semua sesi.
+    """
+    errors = []
+    for quantization, path in model_variants(model_name):
+        try:
+            pool = queue.Queue()
+            for _ in range(POOL_SIZE):
+                pool.put(create_interpreter(path, quantization))
             break
-        quality -= 5
+        except Exception as e:
+            errors.append(f"{path}: {e}")
+    else:
+        st.error("Error loading model:\n" + "\n".join(errors))
+        return None
+
+    def predict(pixels):
+        """Jalankan batch piksel uint8 (N, 224, 224, 3), kembalikan probabilitas."""
+        interpreter, input_details, output_details = entry = pool.get()
+        try:
+            # Satu forward pass untuk seluruh batch; resize hanya bila ukuran batch berubah
+            if interpreter.get_input_details()[0]["shape"][0] != len(pixels):
+                interpreter.resize_tensor_input(input_details["index"], pixels.shape)
+                interpreter.allocate_tensors()
+            interpreter.set_tensor(input_details["index"], to_model_input(pixels, input_details))
+            interpreter.invoke()
+            return dequantize(interpreter.get_tensor(output_details["index"]), output_details)
+        finally:
+            pool.put(entry)
+
+    return predict
+
+@st.cache_resource(show_spinner=False)
+def load_preprocessor():
+    """
+    Bangun tf.function decode + resize (di-trace sekali per worker).
+    JPEG di-decode langsung pada skala 1/2, 1/4 atau 1/8 bila resolusinya cukup besar;
+    format lain (PNG, GIF, BMP, WebP) lewat tf.io.decode_image.
+    Kembalikan (pixels, preview): piksel uint8 (1, 224, 224, 3) untuk model dan
+    JPEG 224×224 dari piksel yang sama untuk ditampilkan.
+    """
+    tf = load_tf()
 
-    buf.seek(0)
-    return buf
+    def decode_jpeg(raw):
+        height, width = tf.unstack(tf.io.extract_jpeg_shape(raw)[:2])
+        scale = tf.minimum(height, width) // TARGET_SIZE[0]
+        branch = tf.reduce_sum(tf.cast(scale >= [2, 4, 8], tf.int32))
+        return tf.switch_case(branch, [
+            lambda r=r: tf.io.decode_jpeg(raw, channels=3, ratio=r, dct_method="INTEGER_FAST")
+            for r in (1, 2, 4, 8)
+        ])
+
+    @tf.function(input_signature=[tf.TensorSpec([], tf.string)])
+    def preprocess(raw):
+        img = tf.cond(
+            tf.io.is_jpeg(raw),
+            lambda: decode_jpeg(raw),
+            lambda: tf.io.decode_image(raw, channels=3, expand_animations=False),
+        )
+        img = tf.image.resize(img, TARGET_SIZE, method="bilinear", antialias=False)
+        pixels = tf.saturate_cast(tf.round(img), tf.uint8)
+        return pixels[tf.newaxis], tf.io.encode_jpeg(pixels, quality=90)
+
+    preprocess.get_concrete_function()  # trace sekarang, bukan saat upload pertama
+    return preprocess
+
+def decode_upload(preprocess, raw):
+    """
+    Jalankan preprocess pada byte upload. Format yang tidak dikenal TensorFlow
+    (mis. WebP) di-decode dan di-resize dengan PIL, lalu dikirim sebagai PNG kecil.
+    PIL melempar OSError untuk file yang rusak atau bukan gambar.
+    """
+    tf = load_tf()
+    try:
+        return preprocess(raw)
+    except tf.errors.InvalidArgumentError:
+        img = Image.open(io.BytesIO(raw)).convert("RGB").resize(TARGET_SIZE, Image.BILINEAR)
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        return preprocess(buf.getvalue())
 
 def display_spices():
     """Tampilkan grid 2×2 gambar rempah beserta deskripsinya."""
-    spice_dir = "datatest"
-    imgs = {
-        'Kunyit':  os.path.join(spice_dir, "kunyit.jpeg"),
-        'Kencur':  os.path.join(spice_dir, "kencur.jpeg"),
-        'Jahe':    os.path.join(spice_dir, "jahe.jpeg"),
-        'Lengkuas':os.path.join(spice_dir, "lengkuas.jpeg"),
-    }
+    imgs = load_spice_images()
 # Deskripsi untuk tiap rempah
     descriptions = {
         'Kunyit': 'Kunyit (_Curcuma longa_) mengandung kurkumin dan minyak atsiri yang efektif meredakan nyeri gastritis. Senyawa tersebut membantu melapisi dinding lambung yang luka serta menurunkan produksi asam lambung, sehingga bisa mengontrol kelebihan asam di perut (Syafila et al., 2024)',
@@ -74,9 +228,9 @@ def display_spices():
     }
 
     cols = st.columns(2)
-    for i, (name, img_path) in enumerate(imgs.items()):
+    for i, name in enumerate(descriptions):
         with cols[i % 2]:
-            st.image(img_path, caption=name, use_column_width=True)
+            st.image(imgs[name], caption=name, use_column_width=True)
             st.markdown(f"**{name}**  \n{descriptions[name]}")
 
 # ─── Layout ────────────────────────────────────────────────────────────────────
@@ -115,32 +269,60 @@ def classify():
     st.title("📸 Classification")
     st.markdown("Unggah gambar rempah untuk prediksi jenisnya.")
 
+    # Muat & panaskan semua model saat halaman ini pertama dibuka (sekali per worker)
+    with st.spinner("Memuat model..."):
+        for name in MODEL_OPTIONS:
+            load_predictor(name)
+        load_preprocessor()
+
     model_name = st.selectbox("Pilih model:", list(MODEL_OPTIONS.keys()))
-    model_path = MODEL_OPTIONS[model_name]
-    model = load_model(model_path)
-    if model is None:
+    predict = load_predictor(model_name)
+    if predict is None:
         return
 
-    uploaded = st.file_uploader("Pilih file (jpg/png)", type=["jpg","jpeg","png"])
-    if not uploaded:
+    uploads = st.file_uploader(
+        "Pilih file (jpg/png), bisa lebih dari satu",
+        type=["jpg","jpeg","png"],
+        accept_multiple_files=True,
+    )
+    if not uploads:
         st.info("Silakan unggah gambar terlebih dahulu.")
         return
 
-    # Kompres dulu agar file lebih kecil 
-    compressed = compress_image(uploaded, max_size_kb=200)
-
-    # Preprocess
-    img = load_img(compressed, target_size=TARGET_SIZE)
-    arr = img_to_array(img) / 255.0
-    st.image(arr, caption="Gambar Masukan", width=300)
+    # Preprocess: isi satu batch (N, 224, 224, 3) hanya dari gambar yang berhasil di-decode
+    tf = load_tf()
+    preprocess = load_preprocessor()
+    batch = np.empty((len(uploads), *TARGET_SIZE, 3), dtype=np.uint8)
+    names, previews = [], []
+    for uploaded in uploads:
+        try:
+            pixels, preview = decode_upload(preprocess, uploaded.getvalue())
+        except (tf.errors.InvalidArgumentError, OSError):
+            st.warning(f"{uploaded.name}: file tidak bisa dibaca sebagai gambar, dilewati.")
+            continue
+        batch[len(names)] = pixels[0]
+        names.append(uploaded.name)
+        previews.append(preview.numpy())
+    if not names:
+        return
+    batch = batch[:len(names)]
 
-    # Predict
-    probs = model.predict(np.expand_dims(arr, 0))[0]
-    idx = int(np.argmax(probs))
-    label = CLASS_MAPPING[idx]
-    confidence = probs[idx]
+    # Predict per potongan MAX_BATCH agar memori interpreter tetap terbatas;
+    # output (N, 4), argmax & confidence untuk semua baris sekaligus
+    probs = np.concatenate([
+        predict(batch[start:start + MAX_BATCH])
+        for start in range(0, len(batch), MAX_BATCH)
+    ])
+    indices = np.argmax(probs, axis=1)
+    confidences = probs[np.arange(len(probs)), indices]
 
-    st.success(f"**Classification ({model_name}):** {label}\n\n**Confidence Score:** {confidence:.2%}")
+    cols = st.columns(min(len(names), RESULT_COLS))
+    for i, name in enumerate(names):
+        label = CLASS_MAPPING[int(indices[i])]
+        confidence = float(confidences[i])
+        with cols[i % len(cols)]:
+            st.image(previews[i], caption=name, width=300)
+            st.success(f"**Classification ({model_name}):** {label}\n\n**Confidence Score:** {confidence:.2%}")
 
 # ─── ABOUT PAGE ─────────────────────────────────────────────────────────────────
 def about():
@@ -164,14 +346,14 @@ def about():
     st.subheader("**Arsitektur Model**")
     col1, col2 = st.columns(2)
     with col1:
-        st.image("arc/arch_mobilenet_v1.png", caption="MobileNetV1", width=400)
+        st.image("assets/arch_mobilenet_v1.png", caption="MobileNetV1", width=400)
     with col2:
-        st.image("arc/arch_mobilenet_v2.png", caption="MobileNetV2", width=400)
+        st.image("assets/arch_mobilenet_v2.png", caption="MobileNetV2", width=400)
 
     st.markdown("---")
     st.subheader("**Grafik Pelatihan**")
-    st.image("graph/graph_mobilenetv1.png", caption="Training Plot MobileNetV1", use_column_width=True)
-    st.image("graph/graph_mobilenetv2.png", caption="Training Plot MobileNetV2", use_column_width=True)
+    st.image("assets/graph_mobilenetv1.png", caption="Training Plot MobileNetV1", use_column_width=True)
+    st.image("assets/graph_mobilenetv2.png", caption="Training Plot MobileNetV2", use_column_width=True)
 
 # ─── MAIN ───────────────────────────────────────────────────────────────────────
 if menu == "Home":
@@ -183,5 +365,5 @@ elif menu == "About":
 
 # ─── FOOTER ─────────────────────────────────────────────────────────────────────
 st.sidebar.markdown("---")
-st.sidebar.image("remove.png", width=150)
+st.sidebar.image("assets/remove.png", width=150)
 st.sidebar.markdown("© 2025 Najmah Femalea. All rights reserved.", unsafe_allow_html=True)
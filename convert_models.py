@@ -0,0 +1,157 @@
+"""
+Konversi checkpoint Keras (.h5) ke TFLite FlatBuffer.
+
+Jalankan sekali setelah model dilatih ulang:
+
+    python convert_models.py
+
+Setiap file hasil konversi lalu diuji dengan predict ber-batch di proses
+terpisah. Untuk menguji file .tflite yang sudah ada tanpa konversi ulang:
+
+    python convert_models.py --check
+
+Menghasilkan <nama>_fp16.tflite (bobot float16), <nama>_dynamic.tflite
+(kuantisasi dynamic-range, bobot int8; fallback bila varian utama gagal
+dimuat) dan <nama>_int8.tflite (kuantisasi penuh int8, input/output uint8,
+dikalibrasi dengan gambar datatest/) di samping file .h5. Aplikasi hanya
+memakai varian int8 bila SPICELINK_INT8=1.
+"""
+import os
+import sys
+import glob
+import subprocess
+import numpy as np
+import tensorflow as tf
+
+# ─── Configuration ─────────────────────────────────────────────────────────────
+KERAS_MODELS  = ["MobileNetV1_no_dropout.h5", "MobileNetV2_no_dropout.h5"]
+QUANTIZATIONS = ("fp16", "dynamic", "int8")
+INPUT_SHAPE   = (1, 224, 224, 3)
+CALIB_IMAGES  = "datatest/*.jpeg"
+CALIB_SAMPLES = 100
+# Varian yang aman dipakai dengan delegate XNNPACK bawaan. Model dynamic-range +
+# XNNPACK + resize_tensor_input ke batch >= 3 merusak heap (SIGSEGV/abort), jadi
+# varian itu dijalankan tanpa delegate default.
+XNNPACK_SAFE  = ("fp16", "int8")
+CHECK_BATCHES = (1, 3, 8)  # 8 = MAX_BATCH di app.py
+CHECK_ROUNDS  = 3          # interpreter dibuat & dibebaskan berulang agar kerusakan heap muncul
+
+# ─── Helper Functions ──────────────────────────────────────────────────────────
+def tflite_path(h5_path, quantization="fp16"):
+    """Path file .tflite untuk checkpoint .h5 dengan kuantisasi tertentu."""
+    return f"{os.path.splitext(h5_path)[0]}_{quantization}.tflite"
+
+def op_resolver_type(quantization):
+    """OpResolverType untuk tf.lite.Interpreter sesuai varian kuantisasi."""
+    resolvers = tf.lite.experimental.OpResolverType
+    if quantization in XNNPACK_SAFE:
+        return resolvers.BUILTIN  # kernel bawaan + delegate default (XNNPACK)
+    return resolvers.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+
+def representative_dataset():
+    """
+    Sampel kalibrasi int8: crop & flip acak dari gambar datatest/, diproses
+    sama seperti di aplikasi (resize bilinear, skala [0, 1]).
+    """
+    paths = sorted(glob.glob(CALIB_IMAGES))
+    if not paths:
+        raise FileNotFoundError(f"No calibration images match {CALIB_IMAGES!r}")
+    rng = tf.random.Generator.from_seed(0)
+    for i in range(CALIB_SAMPLES):
+        img = tf.io.decode_jpeg(tf.io.read_file(paths[i % len(paths)]), channels=3)
+        size = tf.cast(tf.cast(tf.shape(img)[:2], tf.float32) * rng.uniform([], 0.6, 1.0), tf.int32)
+        img = tf.image.stateless_random_crop(img, tf.concat([size, [3]], 0), seed=rng.make_seeds()[:, 0])
+        img = tf.image.stateless_random_flip_left_right(img, seed=rng.make_seeds()[:, 0])
+        img = tf.image.resize(img, INPUT_SHAPE[1:3], method="bilinear")
+        yield [img[tf.newaxis] * (1.0 / 255.0)]
+
+def convert(h5_path, quantization="fp16"):
+    """Konversi satu checkpoint .h5 ke .tflite dan kembalikan path-nya."""
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization!r}")
+
+    model = tf.keras.models.load_model(h5_path, compile=False)
+
+    # Bentuk input tetap (batch=1) agar graf statis dan tidak perlu resize saat inferensi
+    inputs = tf.keras.Input(shape=INPUT_SHAPE[1:], batch_size=INPUT_SHAPE[0])
+    model = tf.keras.Model(inputs, model(inputs, training=False))
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "fp16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type  = tf.uint8
+        converter.inference_output_type = tf.uint8
+
+    out_path = tflite_path(h5_path, quantization)
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    return out_path
+
+def check_batched(path, quantization):
+    """
+    Jalankan predict ber-batch seperti aplikasi (resize_tensor_input ke setiap
+    ukuran di CHECK_BATCHES) dan bandingkan dengan hasil per gambar.
+    """
+    rng = np.random.default_rng(0)
+    for _ in range(CHECK_ROUNDS):
+        interpreter = tf.lite.Interpreter(
+            model_path=path, experimental_op_resolver_type=op_resolver_type(quantization)
+        )
+        interpreter.allocate_tensors()
+        input_details  = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        shape = (max(CHECK_BATCHES), *INPUT_SHAPE[1:])
+        if input_details["dtype"] == np.float32:
+            pixels = rng.random(shape, dtype=np.float32)
+        else:
+            pixels = rng.integers(0, 256, shape).astype(input_details["dtype"])
+
+        def run(batch):
+            if interpreter.get_input_details()[0]["shape"][0] != len(batch):
+                interpreter.resize_tensor_input(input_details["index"], batch.shape)
+                interpreter.allocate_tensors()
+            interpreter.set_tensor(input_details["index"], batch)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_details["index"]).astype(np.float32)
+
+        reference = np.concatenate([run(pixels[i:i + 1]) for i in range(len(pixels))])
+        outputs = {n: run(pixels[:n]) for n in CHECK_BATCHES}
+        # Bebaskan interpreter di sini: kerusakan heap baru terlihat saat free/malloc berikutnya
+        del run, interpreter
+
+        atol = 1e-5 if output_details["dtype"] == np.float32 else 1
+        for n, output in outputs.items():
+            if not np.allclose(output, reference[:n], atol=atol):
+                diff = np.abs(output - reference[:n]).max()
+                raise AssertionError(f"{path}: batch {n} differs from per-image output (max diff {diff})")
+
+def check_in_subprocess(path, quantization):
+    """
+    Jalankan check_batched() di proses terpisah; kerusakan memori di runtime
+    TFLite hanya terlihat sebagai proses yang mati (SIGSEGV/abort).
+    """
+    result = subprocess.run([sys.executable, __file__, "--check-one", path, quantization])
+    if result.returncode != 0:
+        raise RuntimeError(f"Batched check failed for {path} (exit code {result.returncode})")
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--check-one"]:
+        check_batched(*sys.argv[2:4])
+        sys.exit(0)
+
+    # --check: hanya periksa file .tflite yang sudah ada, tanpa konversi ulang
+    check_only = sys.argv[1:2] == ["--check"]
+    for h5_path in KERAS_MODELS:
+        for quantization in QUANTIZATIONS:
+            out_path = tflite_path(h5_path, quantization)
+            if not check_only:
+                out_path = convert(h5_path, quantization)
+                print(f"{h5_path} -> {out_path} ({os.path.getsize(out_path) / 1024:.0f} KB)")
+            elif not os.path.exists(out_path):
+                continue
+            check_in_subprocess(out_path, quantization)
+            print(f"{out_path}: batched check OK ({quantization})")
@@ -0,0 +1,56 @@
+"""
+Siapkan gambar UI yang sudah diperkecil di folder assets/.
+
+Jalankan sekali setiap kali gambar sumber berubah:
+
+    python optimize_assets.py
+
+st.image hanya meneruskan byte apa adanya bila gambar tidak lebih lebar dari
+lebar tampilan dan formatnya JPEG (tanpa alpha) atau PNG (dengan alpha);
+selain itu gambar di-resize dan di-encode ulang di server pada setiap render.
+"""
+import os
+from PIL import Image
+
+# ─── Configuration ─────────────────────────────────────────────────────────────
+ASSET_DIR = "assets"
+ASSETS = {
+    # sumber                          : lebar target (px)
+    "datatest/jahe.jpeg":              600,
+    "datatest/kencur.jpeg":            600,
+    "datatest/kunyit.jpeg":            600,
+    "datatest/lengkuas.jpeg":          600,
+    "arc/arch_mobilenet_v1.png":       400,
+    "arc/arch_mobilenet_v2.png":       400,
+    "graph/graph_mobilenetv1.png":     1200,
+    "graph/graph_mobilenetv2.png":     1200,
+    "remove.png":                      150,
+}
+
+# ─── Helper Functions ──────────────────────────────────────────────────────────
+def optimize(src, width):
+    """Resize src ke lebar width dan simpan ke ASSET_DIR, kembalikan path-nya."""
+    img = Image.open(src)
+    if img.width > width:
+        height = round(img.height * width / img.width)
+        img = img.resize((width, height), Image.LANCZOS)
+
+    # Ekstensi output mengikuti encoder, bukan ekstensi file sumber
+    name = os.path.splitext(os.path.basename(src))[0]
+    if img.mode in ("RGB", "L"):
+        out_path = os.path.join(ASSET_DIR, f"{name}.jpeg")
+        img.convert("RGB").save(out_path, "JPEG", quality=85, optimize=True, progressive=True)
+    else:
+        out_path = os.path.join(ASSET_DIR, f"{name}.png")
+        # Diagram & plot: palet 256 warna cukup dan jauh lebih kecil
+        img = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        img.save(out_path, "PNG", optimize=True)
+    return out_path
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    for src, width in ASSETS.items():
+        out_path = optimize(src, width)
+        print(f"{src} ({os.path.getsize(src) / 1024:.0f} KB) -> "
+              f"{out_path} ({os.path.getsize(out_path) / 1024:.0f} KB)")